@@ -2,8 +2,8 @@
 ## This hook is used to check for LiteLLM managed files in the request body, and replace them with model-specific file id
 
 import asyncio
-import base64
-import uuid
+import os
+import sys
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional, Union, cast
 
@@ -14,7 +14,7 @@ from litellm.litellm_core_utils.prompt_templates.common_utils import extract_fil
 from litellm.proxy._types import CallTypes, UserAPIKeyAuth
 from litellm.types.llms.openai import (
     AllMessageValues,
-    ChatCompletionFileObject,
+    ChatCompletionFileObjectFile,
     CreateFileRequest,
     OpenAIFileObject,
     OpenAIFilesPurpose,
@@ -35,6 +35,24 @@ else:
     InternalUsageCache = Any
     PrismaClient = Any
 
+try:
+    import pybase64 as base64  # SIMD-accelerated, drop-in for stdlib base64
+except ImportError:
+    import base64  # type: ignore
+
+# enum values bound once - these are checked per file id on every request
+_PREFIX: str = SpecialEnums.LITELM_MANAGED_FILE_ID_PREFIX.value
+_PREFIX_BYTES: bytes = _PREFIX.encode()
+_COMPLETE_FMT: str = SpecialEnums.LITELLM_MANAGED_FILE_COMPLETE_STR.value
+# cache key prefix for stored file objects
+_KEY_PREFIX: str = sys.intern("litellm_proxy/")
+
+# base64 of the managed file id prefix, truncated to the complete 4-char groups
+# so it is a stable prefix of every encoded unified file id
+_B64_PREFIX = base64.urlsafe_b64encode(_PREFIX.encode()).decode()[
+    : len(_PREFIX) // 3 * 4
+]
+
 
 class BaseFileEndpoints(ABC):
     @abstractmethod
@@ -65,42 +83,96 @@ class _PROXY_LiteLLMManagedFiles(CustomLogger):
     ):
         self.internal_usage_cache = internal_usage_cache
         self.prisma_client = prisma_client
+        # write-behind buffer of cache key -> file object, flushed in one pipelined write
+        self.pending_file_object_writes: Dict[str, OpenAIFileObject] = {}
+        self.pending_file_object_writes_flush_task: Optional[asyncio.Task] = None
 
-    async def store_unified_file_id(
-        self,
-        file_id: str,
-        file_object: OpenAIFileObject,
-        litellm_parent_otel_span: Optional[Span],
+    @staticmethod
+    def _serialize_file_object(file_object: OpenAIFileObject) -> str:
+        """
+        Serialize with pydantic-core's JSON encoder - the redis cache json.dumps() the value, which can't handle BaseModel
+        """
+        return file_object.model_dump_json()
+
+    @staticmethod
+    def _deserialize_file_object(cached_value: Any) -> Optional[OpenAIFileObject]:
+        if cached_value is None or isinstance(cached_value, OpenAIFileObject):
+            return cached_value
+        if isinstance(cached_value, (str, bytes)):
+            return OpenAIFileObject.model_validate_json(cached_value)
+        if isinstance(cached_value, dict):
+            return OpenAIFileObject.model_validate(cached_value)
+        return None
+
+    def add_pending_file_object_write(
+        self, file_id: str, file_object: OpenAIFileObject
     ) -> None:
-        key = f"litellm_proxy/{file_id}"
-        verbose_logger.info(
-            f"Storing LiteLLM Managed File object with id={file_id} in cache"
-        )
-        await self.internal_usage_cache.async_set_cache(
-            key=key,
-            value=file_object,
-            litellm_parent_otel_span=litellm_parent_otel_span,
-        )
+        """
+        Buffer a file object write, coalescing writes to the same key.
+
+        Starts a flush task if one isn't already running.
+        """
+        key = _KEY_PREFIX + file_id
+        self.pending_file_object_writes[key] = file_object
+        if (
+            self.pending_file_object_writes_flush_task is None
+            or self.pending_file_object_writes_flush_task.done()
+        ):
+            self.pending_file_object_writes_flush_task = asyncio.create_task(
+                self.flush_pending_file_object_writes()
+            )
+
+    async def flush_pending_file_object_writes(self) -> None:
+        """
+        Write all buffered file objects to the cache in a single pipelined call.
+
+        Not attributed to a request span - a batch holds writes from many requests.
+
+        Keeps flushing until no writes were buffered while the last flush was in flight.
+        """
+        while self.pending_file_object_writes:
+            pending_writes = self.pending_file_object_writes
+            self.pending_file_object_writes = {}
+            verbose_logger.info(
+                f"Storing {len(pending_writes)} LiteLLM Managed File object(s) in cache"
+            )
+            ## write errors are caught and logged by the dual cache
+            await self.internal_usage_cache.async_batch_set_cache(
+                cache_list=[
+                    (key, self._serialize_file_object(file_object))
+                    for key, file_object in pending_writes.items()
+                ],
+                litellm_parent_otel_span=None,
+            )
 
     async def get_unified_file_id(
         self, file_id: str, litellm_parent_otel_span: Optional[Span] = None
     ) -> Optional[OpenAIFileObject]:
-        key = f"litellm_proxy/{file_id}"
-        return await self.internal_usage_cache.async_get_cache(
+        key = _KEY_PREFIX + file_id
+        ## check writes not yet flushed to the cache
+        pending_file_object = self.pending_file_object_writes.get(key)
+        if pending_file_object is not None:
+            return pending_file_object
+        cached_value = await self.internal_usage_cache.async_get_cache(
             key=key,
             litellm_parent_otel_span=litellm_parent_otel_span,
         )
+        return self._deserialize_file_object(cached_value)
 
     async def delete_unified_file_id(
         self, file_id: str, litellm_parent_otel_span: Optional[Span] = None
     ) -> OpenAIFileObject:
-        key = f"litellm_proxy/{file_id}"
+        key = _KEY_PREFIX + file_id
+        ## drop any write not yet flushed to the cache
+        pending_file_object = self.pending_file_object_writes.pop(key, None)
         ## get old value
-        old_value = await self.internal_usage_cache.async_get_cache(
-            key=key,
-            litellm_parent_otel_span=litellm_parent_otel_span,
+        old_value = pending_file_object or self._deserialize_file_object(
+            await self.internal_usage_cache.async_get_cache(
+                key=key,
+                litellm_parent_otel_span=litellm_parent_otel_span,
+            )
         )
-        if old_value is None or not isinstance(old_value, OpenAIFileObject):
+        if old_value is None:
             raise Exception(f"LiteLLM Managed File object with id={file_id} not found")
         ## delete old value
         await self.internal_usage_cache.async_set_cache(
@@ -132,7 +204,10 @@ class _PROXY_LiteLLMManagedFiles(CustomLogger):
         """
         if call_type == CallTypes.completion.value:
             messages = data.get("messages")
-            if messages:
+            ## skip the full scan if no message has list content - file parts can't be present
+            if messages and any(
+                isinstance(message.get("content"), list) for message in messages
+            ):
                 file_ids = (
                     self.get_file_ids_and_decode_b64_to_unified_uid_from_messages(
                         messages
@@ -153,33 +228,28 @@ class _PROXY_LiteLLMManagedFiles(CustomLogger):
         """
         Gets file ids from messages
         """
-        file_ids = []
+        file_fields: List[ChatCompletionFileObjectFile] = []
         for message in messages:
-            if message.get("role") == "user":
-                content = message.get("content")
-                if content:
-                    if isinstance(content, str):
-                        continue
-                    for c in content:
-                        if c["type"] == "file":
-                            file_object = cast(ChatCompletionFileObject, c)
-                            file_object_file_field = file_object["file"]
-                            file_id = file_object_file_field.get("file_id")
-                            if file_id:
-                                file_ids.append(
-                                    _PROXY_LiteLLMManagedFiles._convert_b64_uid_to_unified_uid(
-                                        file_id
-                                    )
-                                )
-                                file_object_file_field[
-                                    "file_id"
-                                ] = _PROXY_LiteLLMManagedFiles._convert_b64_uid_to_unified_uid(
-                                    file_id
-                                )
+            content = message.get("content")
+            if message.get("role") == "user" and isinstance(content, list):
+                file_fields.extend(c["file"] for c in content if c["type"] == "file")
+
+        file_ids: List[str] = []
+        for file_field in file_fields:
+            file_id = file_field.get("file_id")
+            if file_id:
+                unified_file_id = (
+                    _PROXY_LiteLLMManagedFiles._convert_b64_uid_to_unified_uid(file_id)
+                )
+                file_ids.append(unified_file_id)
+                file_field["file_id"] = unified_file_id
         return file_ids
 
     @staticmethod
     def _convert_b64_uid_to_unified_uid(b64_uid: str) -> str:
+        ## already a unified file id (e.g. messages re-processed on retries/fallbacks)
+        if b64_uid.startswith(_PREFIX):
+            return b64_uid
         is_base64_unified_file_id = (
             _PROXY_LiteLLMManagedFiles._is_base64_encoded_unified_file_id(b64_uid)
         )
@@ -190,34 +260,39 @@ class _PROXY_LiteLLMManagedFiles(CustomLogger):
 
     @staticmethod
     def _is_base64_encoded_unified_file_id(b64_uid: str) -> Union[str, Literal[False]]:
-        # Add padding back if needed
-        padded = b64_uid + "=" * (-len(b64_uid) % 4)
-        # Decode from base64
+        # Cheap prefix check - skip the decode for non-managed file ids
+        if not b64_uid.startswith(_B64_PREFIX):
+            return False
+        # Unpadded base64 can't be 1 char past a 4-char group - reject without raising
+        if len(b64_uid) & 3 == 1:
+            return False
+        # Decode from base64 - work in bytes, only decode to str on a match
         try:
-            decoded = base64.urlsafe_b64decode(padded).decode()
-            if decoded.startswith(SpecialEnums.LITELM_MANAGED_FILE_ID_PREFIX.value):
-                return decoded
+            b64 = b64_uid.encode("ascii")
+            # Add padding back if needed
+            padded = b64 + b"===="[: -len(b64) & 3]
+            decoded = base64.urlsafe_b64decode(padded)
+            if decoded.startswith(_PREFIX_BYTES):
+                return decoded.decode()
             else:
                 return False
         except Exception:
             return False
 
     def convert_b64_uid_to_unified_uid(self, b64_uid: str) -> str:
-        is_base64_unified_file_id = self._is_base64_encoded_unified_file_id(b64_uid)
-        if is_base64_unified_file_id:
-            return is_base64_unified_file_id
-        else:
-            return b64_uid
+        return self._convert_b64_uid_to_unified_uid(b64_uid)
 
     async def get_model_file_id_mapping(
-        self, file_ids: List[str], litellm_parent_otel_span: Span
-    ) -> dict:
+        self, file_ids: List[str], litellm_parent_otel_span: Optional[Span]
+    ) -> Dict[str, Dict[str, str]]:
         """
         Get model-specific file IDs for a list of proxy file IDs.
         Returns a dictionary mapping litellm_proxy/ file_id -> model_id -> model_file_id
 
+        Expects file_ids already decoded to unified file ids (see `convert_b64_uid_to_unified_uid`).
+
         1. Get all the litellm_proxy/ file_ids from the messages
-        2. For each file_id, search for cache keys matching the pattern file_id:*
+        2. Batch get the model file id mappings for all the file_ids from the cache
         3. Return a dictionary of mappings of litellm_proxy/ file_id -> model_id -> model_file_id
 
         Example:
@@ -229,27 +304,24 @@ class _PROXY_LiteLLMManagedFiles(CustomLogger):
         """
 
         file_id_mapping: Dict[str, Dict[str, str]] = {}
-        litellm_managed_file_ids = []
+        litellm_managed_file_ids: List[str] = []
 
         for file_id in file_ids:
             ## CHECK IF FILE ID IS MANAGED BY LITELM
-            is_base64_unified_file_id = self._is_base64_encoded_unified_file_id(file_id)
-
-            if is_base64_unified_file_id:
-                litellm_managed_file_ids.append(is_base64_unified_file_id)
-            elif file_id.startswith(SpecialEnums.LITELM_MANAGED_FILE_ID_PREFIX.value):
+            if file_id.startswith(_PREFIX):
                 litellm_managed_file_ids.append(file_id)
 
         if litellm_managed_file_ids:
-            # Get all cache keys matching the pattern file_id:*
-            for file_id in litellm_managed_file_ids:
-                # Search for any cache key starting with this file_id
-                cached_values = cast(
-                    Dict[str, str],
-                    await self.internal_usage_cache.async_get_cache(
-                        key=file_id, litellm_parent_otel_span=litellm_parent_otel_span
-                    ),
-                )
+            # Get all the file_id mappings in a single cache round-trip
+            batch_cached_values: Optional[
+                List[Optional[Dict[str, str]]]
+            ] = await self.internal_usage_cache.async_batch_get_cache(
+                keys=litellm_managed_file_ids,
+                parent_otel_span=litellm_parent_otel_span,
+            )
+            for file_id, cached_values in zip(
+                litellm_managed_file_ids, batch_cached_values or []
+            ):
                 if cached_values:
                     file_id_mapping[file_id] = cached_values
 
@@ -262,11 +334,7 @@ class _PROXY_LiteLLMManagedFiles(CustomLogger):
         response: LLMResponseTypes,
     ) -> Any:
         if isinstance(response, OpenAIFileObject):
-            asyncio.create_task(
-                self.store_unified_file_id(
-                    response.id, response, user_api_key_dict.parent_otel_span
-                )
-            )
+            self.add_pending_file_object_write(response.id, response)
 
         return None
 
@@ -283,8 +351,11 @@ class _PROXY_LiteLLMManagedFiles(CustomLogger):
 
         file_type = file_data["content_type"]
 
-        unified_file_id = SpecialEnums.LITELLM_MANAGED_FILE_COMPLETE_STR.value.format(
-            file_type, str(uuid.uuid4())
+        # uuid-formatted random id, without building a uuid.UUID object
+        _rand = os.urandom(16).hex()
+        unified_file_id = _COMPLETE_FMT.format(
+            file_type,
+            f"{_rand[:8]}-{_rand[8:12]}-{_rand[12:16]}-{_rand[16:20]}-{_rand[20:]}",
         )
 
         # Convert to URL-safe base64 and strip padding
@@ -349,22 +420,52 @@ class _PROXY_LiteLLMManagedFiles(CustomLogger):
         llm_router: Router,
         **data: Dict,
     ) -> OpenAIFileObject:
-        file_id = self.convert_b64_uid_to_unified_uid(file_id)
+        ## file objects are stored under the id returned to the caller, not the unified id
+        initial_file_id = file_id
+        unified_file_id = self.convert_b64_uid_to_unified_uid(file_id)
         model_file_id_mapping = await self.get_model_file_id_mapping(
-            [file_id], litellm_parent_otel_span
+            [unified_file_id], litellm_parent_otel_span
         )
-        specific_model_file_id_mapping = model_file_id_mapping.get(file_id)
+        specific_model_file_id_mapping = model_file_id_mapping.get(unified_file_id)
         if specific_model_file_id_mapping:
-            for model_id, file_id in specific_model_file_id_mapping.items():
-                await llm_router.afile_delete(model=model_id, file_id=file_id, **data)  # type: ignore
+            ## delete from all models concurrently
+            results = await asyncio.gather(
+                *[
+                    llm_router.afile_delete(model=model_id, file_id=model_file_id, **data)  # type: ignore
+                    for model_id, model_file_id in specific_model_file_id_mapping.items()
+                ],
+                return_exceptions=True,
+            )
+            exception_dict = {}
+            for model_id, result in zip(specific_model_file_id_mapping, results):
+                if isinstance(result, BaseException):
+                    verbose_logger.error(
+                        f"Error deleting file for model_id={model_id} of LiteLLM Managed File id={initial_file_id} - {str(result)}"
+                    )
+                    exception_dict[model_id] = str(result)
+            if exception_dict:
+                ## keep only the failed models in the mapping, so a retry doesn't re-delete files already gone
+                await self.internal_usage_cache.async_set_cache(
+                    key=unified_file_id,
+                    value={
+                        model_id: specific_model_file_id_mapping[model_id]
+                        for model_id in exception_dict
+                    },
+                    litellm_parent_otel_span=litellm_parent_otel_span,
+                )
+                raise Exception(
+                    f"Failed to delete LiteLLM Managed File id={initial_file_id} from model id's: {list(exception_dict.keys())}. Errors: {exception_dict}"
+                )
 
         stored_file_object = await self.delete_unified_file_id(
-            file_id, litellm_parent_otel_span
+            initial_file_id, litellm_parent_otel_span
         )
         if stored_file_object:
             return stored_file_object
         else:
-            raise Exception(f"LiteLLM Managed File object with id={file_id} not found")
+            raise Exception(
+                f"LiteLLM Managed File object with id={initial_file_id} not found"
+            )
 
     async def afile_content(
         self,
@@ -384,11 +485,32 @@ class _PROXY_LiteLLMManagedFiles(CustomLogger):
         specific_model_file_id_mapping = model_file_id_mapping.get(unified_file_id)
         if specific_model_file_id_mapping:
             exception_dict = {}
-            for model_id, file_id in specific_model_file_id_mapping.items():
-                try:
-                    return await llm_router.afile_content(model=model_id, file_id=file_id, **data)  # type: ignore
-                except Exception as e:
-                    exception_dict[model_id] = str(e)
+            ## race all models, return the first successful response
+            tasks = {
+                asyncio.create_task(
+                    llm_router.afile_content(model=model_id, file_id=model_file_id, **data)  # type: ignore
+                ): model_id
+                for model_id, model_file_id in specific_model_file_id_mapping.items()
+            }
+            pending = set(tasks)
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    ## retrieve every exception in `done` before returning, else asyncio logs them as never retrieved
+                    successful_task: Optional[asyncio.Task] = None
+                    for task in done:
+                        exception = task.exception()
+                        if exception is not None:
+                            exception_dict[tasks[task]] = str(exception)
+                        elif successful_task is None:
+                            successful_task = task
+                    if successful_task is not None:
+                        return successful_task.result()
+            finally:
+                for task in pending:
+                    task.cancel()
             raise Exception(
                 f"LiteLLM Managed File object with id={initial_file_id} not found. Checked model id's: {specific_model_file_id_mapping.keys()}. Errors: {exception_dict}"
             )
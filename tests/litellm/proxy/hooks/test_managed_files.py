@@ -9,13 +9,34 @@ sys.path.insert(
     0, os.path.abspath("../../../..")
 )  # Adds the parent directory to the system path
 
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 from litellm.caching import DualCache
+from litellm.proxy._types import UserAPIKeyAuth
 from litellm.proxy.hooks.managed_files import _PROXY_LiteLLMManagedFiles
+from litellm.proxy.utils import InternalUsageCache
+from litellm.types.llms.openai import OpenAIFileObject
 from litellm.types.utils import SpecialEnums
 
 
+B64_UNIFIED_FILE_ID = "bGl0ZWxsbV9wcm94eTphcHBsaWNhdGlvbi9wZGY7dW5pZmllZF9pZCxmYzdmMmVhNS0wZjUwLTQ5ZjYtODljMS03ZTZhNTRiMTIxMzg"
+UNIFIED_FILE_ID = (
+    "litellm_proxy:application/pdf;unified_id,fc7f2ea5-0f50-49f6-89c1-7e6a54b12138"
+)
+
+
+def _make_file_object(file_id: str, filename: str = "test.pdf") -> OpenAIFileObject:
+    return OpenAIFileObject(
+        id=file_id,
+        object="file",
+        purpose="user_data",
+        created_at=1234567890,
+        bytes=100,
+        filename=filename,
+        status="uploaded",
+    )
+
+
 def test_get_file_ids_and_decode_b64_to_unified_uid_from_messages():
     proxy_managed_files = _PROXY_LiteLLMManagedFiles(
         DualCache(), prisma_client=MagicMock()
@@ -49,6 +70,152 @@ def test_get_file_ids_and_decode_b64_to_unified_uid_from_messages():
     )
 
 
+def test_is_base64_encoded_unified_file_id():
+    assert (
+        _PROXY_LiteLLMManagedFiles._is_base64_encoded_unified_file_id(
+            B64_UNIFIED_FILE_ID
+        )
+        == UNIFIED_FILE_ID
+    )
+    ## non-managed ids are rejected without decoding
+    assert (
+        _PROXY_LiteLLMManagedFiles._is_base64_encoded_unified_file_id("file-abc123")
+        is False
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_model_file_id_mapping():
+    cache = DualCache()
+    proxy_managed_files = _PROXY_LiteLLMManagedFiles(cache, prisma_client=MagicMock())
+    await cache.async_set_cache(
+        key=UNIFIED_FILE_ID, value={"model-1": "file-abc123", "model-2": "file-def456"}
+    )
+
+    model_file_id_mapping = await proxy_managed_files.get_model_file_id_mapping(
+        [
+            UNIFIED_FILE_ID,
+            "litellm_proxy:application/pdf;unified_id,missing",
+            "file-not-managed",
+        ],
+        litellm_parent_otel_span=None,
+    )
+
+    assert model_file_id_mapping == {
+        UNIFIED_FILE_ID: {"model-1": "file-abc123", "model-2": "file-def456"}
+    }
+
+
+@pytest.mark.asyncio
+async def test_async_post_call_success_hook_write_behind():
+    proxy_managed_files = _PROXY_LiteLLMManagedFiles(
+        InternalUsageCache(DualCache()), prisma_client=MagicMock()
+    )
+    file_objects = [
+        _make_file_object(f"file-{i}", filename=f"test{i}.pdf") for i in range(3)
+    ]
+    for file_object in file_objects:
+        await proxy_managed_files.async_post_call_success_hook(
+            data={}, user_api_key_dict=UserAPIKeyAuth(), response=file_object
+        )
+
+    ## readable before the flush
+    assert await proxy_managed_files.get_unified_file_id("file-0") == file_objects[0]
+
+    await proxy_managed_files.pending_file_object_writes_flush_task
+    assert proxy_managed_files.pending_file_object_writes == {}
+    for file_object in file_objects:
+        stored_file_object = await proxy_managed_files.get_unified_file_id(
+            file_object.id
+        )
+        assert isinstance(stored_file_object, OpenAIFileObject)
+        assert stored_file_object.model_dump() == file_object.model_dump()
+
+
+@pytest.mark.asyncio
+async def test_afile_delete():
+    cache = InternalUsageCache(DualCache())
+    proxy_managed_files = _PROXY_LiteLLMManagedFiles(cache, prisma_client=MagicMock())
+    ## stored the way the create file endpoint does - keyed by the base64 id returned to the caller
+    file_object = _make_file_object(B64_UNIFIED_FILE_ID)
+    await proxy_managed_files.async_post_call_success_hook(
+        data={}, user_api_key_dict=UserAPIKeyAuth(), response=file_object
+    )
+    await proxy_managed_files.pending_file_object_writes_flush_task
+    await cache.async_set_cache(
+        key=UNIFIED_FILE_ID,
+        value={"model-1": "file-abc123", "model-2": "file-def456"},
+        litellm_parent_otel_span=None,
+    )
+
+    async def _afile_delete(model, file_id, **kwargs):
+        if model == "model-2":
+            raise Exception("provider error")
+
+    llm_router = MagicMock()
+    llm_router.afile_delete = AsyncMock(side_effect=_afile_delete)
+
+    ## a failing model doesn't stop the other deletes, but the managed file is kept for a retry
+    with pytest.raises(Exception) as e:
+        await proxy_managed_files.afile_delete(
+            file_id=B64_UNIFIED_FILE_ID,
+            litellm_parent_otel_span=None,
+            llm_router=llm_router,
+        )
+    assert "model-2" in str(e.value) and "model-1" not in str(e.value)
+    assert llm_router.afile_delete.await_count == 2
+    assert (
+        await proxy_managed_files.get_unified_file_id(B64_UNIFIED_FILE_ID) is not None
+    )
+
+    ## the retry only deletes from the model that failed
+    llm_router.afile_delete = AsyncMock(return_value=None)
+    deleted_file_object = await proxy_managed_files.afile_delete(
+        file_id=B64_UNIFIED_FILE_ID,
+        litellm_parent_otel_span=None,
+        llm_router=llm_router,
+    )
+    llm_router.afile_delete.assert_awaited_once_with(
+        model="model-2", file_id="file-def456"
+    )
+    assert deleted_file_object.model_dump() == file_object.model_dump()
+    assert await proxy_managed_files.get_unified_file_id(B64_UNIFIED_FILE_ID) is None
+
+
+@pytest.mark.asyncio
+async def test_afile_content_returns_first_successful_model():
+    cache = InternalUsageCache(DualCache())
+    proxy_managed_files = _PROXY_LiteLLMManagedFiles(cache, prisma_client=MagicMock())
+    await cache.async_set_cache(
+        key=UNIFIED_FILE_ID,
+        value={"model-1": "file-abc123", "model-2": "file-def456"},
+        litellm_parent_otel_span=None,
+    )
+
+    async def _afile_content(model, file_id, **kwargs):
+        if model == "model-1":
+            raise Exception("file not found")
+        return "file content"
+
+    llm_router = MagicMock()
+    llm_router.afile_content = AsyncMock(side_effect=_afile_content)
+
+    response = await proxy_managed_files.afile_content(
+        file_id=UNIFIED_FILE_ID, litellm_parent_otel_span=None, llm_router=llm_router
+    )
+    assert response == "file content"
+
+    ## all models failing surfaces every error
+    llm_router.afile_content = AsyncMock(side_effect=Exception("file not found"))
+    with pytest.raises(Exception) as e:
+        await proxy_managed_files.afile_content(
+            file_id=UNIFIED_FILE_ID,
+            litellm_parent_otel_span=None,
+            llm_router=llm_router,
+        )
+    assert "model-1" in str(e.value) and "model-2" in str(e.value)
+
+
 # def test_list_managed_files():
 #     proxy_managed_files = _PROXY_LiteLLMManagedFiles(DualCache())
 